@@ -0,0 +1,441 @@
+# vim: set expandtab shiftwidth=4 softtabstop=4:
+
+"""Benchmarks for the ProteinCraft sync and open pipelines.
+
+Synthetic designs, interaction payloads and pcraftin files are generated
+for every combination of models x bonds x atoms, then ``sync``,
+``_process_bonds``, ``_read_pdb_block``, ``open_pcraftin`` and the
+selection-changed handler are timed.
+Each result records wall time, the number of commands issued (and the
+number of ``run`` calls they were batched into), model operations, peak
+Python-allocated memory (tracemalloc) and the process peak RSS, written
+as JSON so runs can be compared across releases. Under ChimeraX most
+structure memory is allocated in C++ and only shows up in the RSS.
+
+Errors and warnings logged by the bundle and failed result checks (e.g.
+fewer models opened than files written) are recorded with each result,
+so a broken pipeline is not mistaken for a fast one. The script exits
+with status 1 if any result is not ok.
+
+Headless, against the stub session in stub_chimerax.py:
+
+    python bench/bench_pipeline.py --models 1,10 --bonds 5,50 --atoms 1000 -o bench_output.txt
+
+Against a real ChimeraX with the bundle installed:
+
+    ChimeraX --nogui --exit --script "bench/bench_pipeline.py -o bench_output.txt"
+"""
+
+import argparse
+import json
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+BENCHMARKS = ["read_pdb_block", "process_bonds", "sync", "sync_warm", "open_pcraftin",
+              "selection_changed"]
+
+RESIDUE_ATOMS = [("N", "N"), ("CA", "C"), ("C", "C"), ("O", "O"), ("CB", "C")]
+
+INTERACTIONS = ["HBOND:SC_MC", "HBOND:SC_SC", "PICATION:SC_SC", "PIPISTACK:SC_SC",
+                "IONIC:SC_SC", "VDW:SC_SC"]
+
+# ==========================================================================
+# Synthetic data
+# ==========================================================================
+
+def _write_pdb(path, num_atoms):
+    """Write a two-chain poly-ALA PDB with roughly num_atoms atoms.
+
+    Returns:
+        tuple: (number of residues in chain A, number of residues in chain B)
+    """
+    num_residues = max(2, num_atoms // len(RESIDUE_ATOMS))
+    chain_lengths = {"A": num_residues // 2, "B": num_residues - num_residues // 2}
+    serial = 1
+    with open(path, "w") as pdb_file:
+        for chain_id, length in chain_lengths.items():
+            offset = 0.0 if chain_id == "A" else 10.0
+            for res_number in range(1, length + 1):
+                for i, (atom_name, element) in enumerate(RESIDUE_ATOMS):
+                    x = offset + 0.3 * i
+                    y = 1.5 * (res_number % 40)
+                    z = 3.8 * (res_number // 40)
+                    pdb_file.write(
+                        f"ATOM  {serial % 100000:5d} {atom_name:<4s} ALA {chain_id}"
+                        f"{res_number:4d}    {x:8.3f}{y:8.3f}{z:8.3f}"
+                        f"  1.00  0.00          {element:>2s}\n")
+                    serial += 1
+        pdb_file.write("END\n")
+    return chain_lengths["A"], chain_lengths["B"]
+
+def _make_bonds(num_bonds, len_a, len_b):
+    """Generate interaction records in the ProteinCraft bond format."""
+    bonds = []
+    for i in range(num_bonds):
+        index1 = i % len_a + 1
+        index2 = (i * 7) % len_b + 1
+        # Every fourth bond uses a coordinate, which needs a marker in ATOM mode
+        atom1 = f"{0.3 * i:.3f},1.500,0.000" if i % 4 == 3 else "CB"
+        bonds.append({
+            "res1": f"A:{index1}:ALA",
+            "res2": f"B:{index2}:ALA",
+            "atom1": atom1,
+            "atom2": "O",
+            "interaction": INTERACTIONS[i % len(INTERACTIONS)],
+        })
+    return bonds
+
+def _make_pcraftin(pdb_path, bonds, len_a, len_b):
+    """Build a pcraftin spec with a mix of fixed and designable contig segments."""
+    fixed_end = max(1, len_a // 2)
+    return {
+        "input_pdb": str(pdb_path),
+        "contigs": [f"A1-{fixed_end}/{len_a - fixed_end}-{len_a - fixed_end}/0", f"B1-{len_b}"],
+        "hotspot_res": [f"B{(i * 11) % len_b + 1}" for i in range(3)],
+        "noise_scale": {"ca": 0.0, "frame": 0.0},
+        "num_designs": 1,
+        "pbonds": bonds,
+    }
+
+class Dataset:
+    """Synthetic designs for one models x bonds x atoms scale."""
+
+    def __init__(self, root, num_models, num_bonds, num_atoms):
+        self.dir = Path(root) / f"m{num_models}_b{num_bonds}_a{num_atoms}"
+        self.dir.mkdir(parents=True)
+        pcraftin_dir = self.dir / "pcraftin"
+        pcraftin_dir.mkdir()
+        self.pdb_paths = []
+        self.bonds = {}
+        for i in range(num_models):
+            pdb_path = self.dir / f"design_{i}.pdb"
+            len_a, len_b = _write_pdb(pdb_path, num_atoms)
+            self.chain_lengths = (len_a, len_b)
+            bonds = _make_bonds(num_bonds, len_a, len_b)
+            with open(pcraftin_dir / f"design_{i}.pcraftin.json", "w") as f:
+                json.dump(_make_pcraftin(pdb_path, bonds, len_a, len_b), f)
+            self.pdb_paths.append(str(pdb_path))
+            self.bonds[str(pdb_path)] = bonds
+        self.pcraftin_dir = str(pcraftin_dir)
+        self.sync_json = json.dumps({
+            path: {"display": True, "bonds": bonds} for path, bonds in self.bonds.items()})
+
+# ==========================================================================
+# Instrumentation
+# ==========================================================================
+
+class Recorder:
+    """Counts commands passed to run() and models added or closed, and
+    collects errors and warnings logged by the bundle.
+
+    The stub session also records structure edits (residues and atoms
+    created), which are reported with the model operations.
+    """
+
+    def __init__(self, session):
+        self.session = session
+        self.reset()
+        from chimerax.core.models import ADD_MODELS, REMOVE_MODELS
+        session.triggers.add_handler(ADD_MODELS, lambda t, m: self._count("add", len(m)))
+        session.triggers.add_handler(REMOVE_MODELS, lambda t, m: self._count("close", len(m)))
+        logger = session.logger
+        self._logger_methods = (logger.error, logger.warning)
+        logger.error = self._wrap_log(logger.error, self.errors)
+        logger.warning = self._wrap_log(logger.warning, self.warnings)
+
+    def restore_logger(self):
+        self.session.logger.error, self.session.logger.warning = self._logger_methods
+
+    def reset(self):
+        self.commands = 0
+        self.run_calls = 0
+        self._model_ops = {}
+        # Cleared in place, the logger wrappers hold these lists
+        if hasattr(self, "errors"):
+            self.errors.clear()
+            self.warnings.clear()
+        else:
+            self.errors = []
+            self.warnings = []
+        if hasattr(self.session, "reset_counters"):
+            self.session.reset_counters()
+
+    @property
+    def model_ops(self):
+        return getattr(self.session, "model_ops", self._model_ops)
+
+    def _count(self, op, count):
+        self._model_ops[op] = self._model_ops.get(op, 0) + count
+
+    @staticmethod
+    def _wrap_log(method, messages):
+        def recording_log(msg, *args, **kw):
+            messages.append(msg)
+            return method(msg, *args, **kw)
+        return recording_log
+
+    def wrap(self, run):
+        def counting_run(session, text, *args, **kw):
+            self.run_calls += 1
+            self.commands += sum(1 for c in text.split(";") if c.strip())
+            return run(session, text, *args, **kw)
+        return counting_run
+
+def _peak_rss_bytes():
+    """Return the process peak resident set size, or None if unavailable."""
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and in kilobytes elsewhere
+    return peak if sys.platform == "darwin" else peak * 1024
+
+def _close_all(session):
+    session.models.close(session.models.list())
+
+# ==========================================================================
+# Benchmarks
+# ==========================================================================
+
+def _setup_none(session, data):
+    return None
+
+def _setup_structures(session, data):
+    from chimerax.proteincraft.cmd import _open_model
+    return [_open_model(session, path) for path in data.pdb_paths]
+
+def _setup_sync_warm(session, data):
+    from chimerax.proteincraft.cmd import sync
+    sync(session, jsonString=data.sync_json)
+    return None
+
+def _setup_selection(session, data):
+    from chimerax.proteincraft.ProteinCraftData import ProteinCraftData
+    ProteinCraftData.get_instance().set_selection_state({})
+    return _setup_structures(session, data)
+
+def _select(session, models, data, start, end):
+    """Select residues start-end of both chains in every model (clear if start > end)."""
+    if not hasattr(session, "reset_counters"):
+        # Real session: not counted, since only the bundle's run() is wrapped
+        from chimerax.core.commands import run
+        if start > end:
+            run(session, "select clear", log=False)
+        else:
+            specs = " ".join(f"#{m.id_string}:{start}-{end}" for m in models)
+            run(session, f"select {specs}", log=False)
+        return
+    import numpy
+    from stub_chimerax import Residues
+    len_a, len_b = data.chain_lengths
+    chain_ids = numpy.array(["A"] * len_a + ["B"] * len_b, dtype=object)
+    numbers = numpy.concatenate((numpy.arange(1, len_a + 1), numpy.arange(1, len_b + 1)))
+    mask = (numbers >= start) & (numbers <= end)
+    groups = []
+    for i, model in enumerate(models):
+        # Unique fake pointers per residue across models
+        pointers = numpy.arange(len(numbers)) + i * len(numbers)
+        if mask.any():
+            groups.append((model, pointers[mask], chain_ids[mask], numbers[mask]))
+    session.selection = Residues(groups)
+
+# Benchmark functions return a list of failed checks (empty if all passed)
+
+def _bench_read_pdb_block(session, data, _):
+    from chimerax.proteincraft.io import _read_pdb_block
+    structures = []
+    for path in data.pdb_paths:
+        with open(path, "r") as pdb_file:
+            structures.append(_read_pdb_block(session, pdb_file)[0])
+    failed = [f"{path}: no atoms read" for path, s in zip(data.pdb_paths, structures)
+              if s is None or not s.num_atoms]
+    # Structures not added to a session are never closed by _close_all
+    for s in structures:
+        if hasattr(s, "delete"):
+            s.delete()
+    return failed
+
+def _bench_process_bonds(session, data, models):
+    from chimerax.proteincraft.cmd import _process_bonds
+    from chimerax.proteincraft.ProteinCraftData import ProteinCraftData
+    return [f"{model.filename}: _process_bonds failed" for model in models
+            if not _process_bonds(session, model, ProteinCraftData.CHAIN_A_COLOR,
+                                  data.bonds[model.filename])]
+
+def _bench_sync(session, data, _):
+    from chimerax.proteincraft.cmd import sync
+    sync(session, jsonString=data.sync_json)
+    return []
+
+def _bench_open_pcraftin(session, data, _):
+    from chimerax.proteincraft.io import open_pcraftin
+    models, _status = open_pcraftin(session, [data.pcraftin_dir], data.pcraftin_dir)
+    # Adding the models triggers rendering of the design specs
+    session.models.add(models)
+    if len(models) != len(data.pdb_paths):
+        return [f"opened {len(models)} of {len(data.pdb_paths)} pcraftin files"]
+    return []
+
+def _bench_selection_changed(session, data, models):
+    from chimerax.proteincraft import _post_selection_changes
+    length = max(data.chain_lengths)
+    half = max(1, length // 2)
+    quarter = max(1, length // 4)
+    # Box-select half of every model, slide the box, then clear
+    for start, end in [(1, half), (quarter + 1, quarter + half), (1, 0)]:
+        _select(session, models, data, start, end)
+        _post_selection_changes(session)
+    return []
+
+BENCHMARK_FUNCS = {
+    "read_pdb_block": (_setup_none, _bench_read_pdb_block),
+    "process_bonds": (_setup_structures, _bench_process_bonds),
+    "sync": (_setup_none, _bench_sync),
+    "sync_warm": (_setup_sync_warm, _bench_sync),
+    "open_pcraftin": (_setup_none, _bench_open_pcraftin),
+    "selection_changed": (_setup_selection, _bench_selection_changed),
+}
+
+def _measure(session, recorder, name, data):
+    """Run one benchmark twice: once for time and counts, once for memory."""
+    setup, bench = BENCHMARK_FUNCS[name]
+
+    state = setup(session, data)
+    recorder.reset()
+    start = time.perf_counter()
+    failed_checks = bench(session, data, state)
+    wall_time = time.perf_counter() - start
+    commands, run_calls = recorder.commands, recorder.run_calls
+    model_ops = dict(recorder.model_ops)
+    errors, warnings = list(recorder.errors), list(recorder.warnings)
+    _close_all(session)
+
+    # tracemalloc slows allocation-heavy code, so memory is measured separately
+    state = setup(session, data)
+    tracemalloc.start()
+    try:
+        bench(session, data, state)
+        python_peak_memory = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    _close_all(session)
+
+    return {
+        "wall_time_s": round(wall_time, 6),
+        "commands": commands,
+        "run_calls": run_calls,
+        "model_ops": model_ops,
+        "python_peak_memory_bytes": python_peak_memory,
+        # High-water mark of the whole process so far, so it only grows
+        # across results; compare runs of the same benchmark and scale
+        "peak_rss_bytes": _peak_rss_bytes(),
+        "errors": errors,
+        "warnings": warnings,
+        "failed_checks": failed_checks,
+        "ok": not (errors or warnings or failed_checks),
+    }
+
+# ==========================================================================
+# Entry point
+# ==========================================================================
+
+def _int_list(text):
+    return [int(v) for v in text.split(",") if v]
+
+def _parse_args(argv):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--models", type=_int_list, default=[1, 10, 50],
+                        help="comma-separated numbers of models (default: 1,10,50)")
+    parser.add_argument("--bonds", type=_int_list, default=[5, 50],
+                        help="comma-separated numbers of bonds per model (default: 5,50)")
+    parser.add_argument("--atoms", type=_int_list, default=[1000, 10000],
+                        help="comma-separated numbers of atoms per model (default: 1000,10000)")
+    parser.add_argument("--benchmarks", type=lambda s: s.split(","), default=BENCHMARKS,
+                        help=f"comma-separated subset of {','.join(BENCHMARKS)}")
+    parser.add_argument("--bond-detail", choices=["CA", "ATOM", "AUTO"], default="AUTO",
+                        help="bond detail type used while benchmarking (default: AUTO)")
+    parser.add_argument("-o", "--output", help="write JSON results to this file instead of stdout")
+    return parser.parse_args(argv)
+
+def _bundle_version():
+    from xml.etree import ElementTree
+    bundle_info = Path(__file__).resolve().parent.parent / "bundle_info.xml"
+    try:
+        return ElementTree.parse(bundle_info).getroot().get("version")
+    except (OSError, ElementTree.ParseError):
+        return None
+
+def main(argv=None, session=None):
+    """Run the benchmarks and write the results as JSON.
+
+    Args:
+        argv: Command-line arguments, defaults to sys.argv[1:]
+        session: A ChimeraX session; if None the stub session is used
+    """
+    args = _parse_args(sys.argv[1:] if argv is None else argv)
+    unknown = set(args.benchmarks) - set(BENCHMARKS)
+    if unknown:
+        raise SystemExit(f"Unknown benchmarks: {', '.join(sorted(unknown))}")
+
+    if session is None:
+        sys.path.insert(0, str(Path(__file__).resolve().parent))
+        import stub_chimerax
+        stub_chimerax.install()
+        session = stub_chimerax.StubSession()
+        mode = "stub"
+    else:
+        mode = "chimerax"
+
+    from chimerax.proteincraft import cmd, io
+    from chimerax.proteincraft.ProteinCraftData import ProteinCraftData, BondDetailType
+    ProteinCraftData.get_instance().set_bond_detail(BondDetailType(args.bond_detail))
+
+    recorder = Recorder(session)
+    original_runs = (cmd.run, io.run)
+    cmd.run, io.run = recorder.wrap(cmd.run), recorder.wrap(io.run)
+    results = []
+    try:
+        with tempfile.TemporaryDirectory(prefix="proteincraft_bench_") as root:
+            for num_models in args.models:
+                for num_bonds in args.bonds:
+                    for num_atoms in args.atoms:
+                        data = Dataset(root, num_models, num_bonds, num_atoms)
+                        for name in args.benchmarks:
+                            result = {"benchmark": name, "models": num_models,
+                                      "bonds": num_bonds, "atoms": num_atoms}
+                            result.update(_measure(session, recorder, name, data))
+                            results.append(result)
+    finally:
+        cmd.run, io.run = original_runs
+        recorder.restore_logger()
+
+    report = {
+        "meta": {
+            "mode": mode,
+            "bundle_version": _bundle_version(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "bond_detail": args.bond_detail,
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        },
+        "ok": all(result["ok"] for result in results),
+        "results": results,
+    }
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output + "\n")
+    else:
+        print(output)
+    return report
+
+if __name__ == "__main__":
+    sys.exit(0 if main()["ok"] else 1)
+elif "session" in globals():
+    # Run via "ChimeraX --script", which provides the session as a global
+    main(session=session)
@@ -0,0 +1,322 @@
+# vim: set expandtab shiftwidth=4 softtabstop=4:
+
+"""Lightweight stand-in for the parts of ChimeraX used by the bundle.
+
+Installing the stub registers fake ``chimerax.*`` modules in
+``sys.modules`` and loads ``src/`` as ``chimerax.proteincraft``, so the
+bundle code can be exercised headless without a ChimeraX install. The
+stub session records every command passed to ``run`` and every model
+operation instead of doing any graphics or structure work.
+"""
+
+import importlib.util
+import sys
+import types
+from pathlib import Path
+
+ADD_MODELS = "add models"
+REMOVE_MODELS = "remove models"
+MODEL_POSITION_CHANGED = "model position changed"
+SELECTION_CHANGED = "selection changed"
+DEREGISTER = "delete handler"
+
+# ==========================================================================
+# Session
+# ==========================================================================
+
+class StubLogger:
+    """Logger that keeps messages instead of printing them."""
+
+    def __init__(self):
+        self.messages = []
+
+    def info(self, msg):
+        self.messages.append(("info", msg))
+
+    def warning(self, msg):
+        self.messages.append(("warning", msg))
+
+    def error(self, msg):
+        self.messages.append(("error", msg))
+
+class StubTriggerSet:
+    """Minimal trigger set supporting handler registration and DEREGISTER."""
+
+    def __init__(self):
+        self._handlers = {}
+
+    def add_handler(self, name, func):
+        self._handlers.setdefault(name, []).append(func)
+        return func
+
+    def activate_trigger(self, name, data):
+        for func in list(self._handlers.get(name, [])):
+            if func(name, data) == DEREGISTER:
+                self._handlers[name].remove(func)
+
+class StubModels:
+    """Model manager that assigns ids and fires add/remove triggers."""
+
+    def __init__(self, session):
+        self._session = session
+        self._models = []
+        self._next_id = 1
+
+    def list(self, type=None):
+        if type is None:
+            return list(self._models)
+        return [m for m in self._models if isinstance(m, type)]
+
+    def add(self, models, parent=None):
+        for model in models:
+            if parent is None:
+                model.id = (self._next_id,)
+                self._next_id += 1
+            else:
+                model.id = parent.id + (len(parent.submodels) + 1,)
+                parent.submodels.append(model)
+            self._models.append(model)
+        self._session.record_model_op("add", len(models))
+        self._session.triggers.activate_trigger(ADD_MODELS, models)
+
+    def close(self, models):
+        for model in models:
+            if model in self._models:
+                self._models.remove(model)
+            for parent in self._models:
+                if model in parent.submodels:
+                    parent.submodels.remove(model)
+        self._session.record_model_op("close", len(models))
+        self._session.triggers.activate_trigger(REMOVE_MODELS, models)
+
+class StubSession:
+    """Session that records issued commands and model operations."""
+
+    def __init__(self):
+        self.logger = StubLogger()
+        self.triggers = StubTriggerSet()
+        self.models = StubModels(self)
+        self.ui = types.SimpleNamespace(is_gui=False, triggers=StubTriggerSet())
+        self.commands = []
+        self.run_calls = 0
+        self.model_ops = {}
+
+    def record_model_op(self, op, count=1):
+        self.model_ops[op] = self.model_ops.get(op, 0) + count
+
+    def reset_counters(self):
+        self.commands = []
+        self.run_calls = 0
+        self.model_ops = {}
+
+# ==========================================================================
+# Models
+# ==========================================================================
+
+class Structure:
+    """Structure model that only counts residues and atoms."""
+
+    def __init__(self, session, name="structure"):
+        self.session = session
+        self.name = name
+        self.id = None
+        self.display = True
+        self.filename = None
+        self.model_color = [129, 109, 249, 255]
+        self.submodels = []
+        self.num_residues = 0
+        self.num_atoms = 0
+
+    @property
+    def id_string(self):
+        return ".".join(str(i) for i in self.id)
+
+    def child_models(self):
+        return list(self.submodels)
+
+    def new_residue(self, name, chain_id, number):
+        self.num_residues += 1
+        self.session.record_model_op("new_residue")
+        return StubResidue(self, name, chain_id, number)
+
+    def connect_structure(self):
+        self.session.record_model_op("connect_structure")
+
+class AtomicStructure(Structure):
+    pass
+
+class StubResidue:
+
+    def __init__(self, structure, name, chain_id, number):
+        self.structure = structure
+        self.name = name
+        self.chain_id = chain_id
+        self.number = number
+
+class Residues:
+    """Residue collection holding per-structure arrays.
+
+    Built from (structure, pointers, chain_ids, numbers) groups; the array
+    attributes are only meaningful for single-structure collections such as
+    those returned by by_structure.
+    """
+
+    def __init__(self, groups=()):
+        self._groups = list(groups)
+
+    @property
+    def by_structure(self):
+        return [(g[0], Residues([g])) for g in self._groups]
+
+    @property
+    def pointers(self):
+        return self._groups[0][1]
+
+    @property
+    def chain_ids(self):
+        return self._groups[0][2]
+
+    @property
+    def numbers(self):
+        return self._groups[0][3]
+
+def selected_residues(session):
+    # Like ChimeraX, only structures still open count as selected
+    selection = getattr(session, "selection", Residues())
+    open_models = session.models.list()
+    return Residues([g for g in selection._groups if g[0] in open_models])
+
+class StubMarker:
+    """Marker atom returned by the stub "marker" command."""
+
+    def __init__(self, structure, serial_number):
+        self.structure = structure
+        self.serial_number = serial_number
+
+def add_atom(name, element, residue, xyz):
+    structure = residue.structure
+    structure.num_atoms += 1
+    structure.session.record_model_op("add_atom")
+    return (name, element, residue, xyz)
+
+# ==========================================================================
+# Commands
+# ==========================================================================
+
+def run(session, text, *, log=True, return_json=False, return_list=False):
+    """Record each command in text and return stub results like ChimeraX."""
+    session.run_calls += 1
+    results = []
+    for command in text.split(";"):
+        command = command.strip()
+        if not command:
+            continue
+        session.commands.append(command)
+        results.append(_run_one(session, command))
+    if return_list:
+        return results
+    # Like ChimeraX, only the last command's result is returned
+    return results[-1] if results else None
+
+def _run_one(session, command):
+    words = command.split()
+    if words[0] == "open":
+        model = AtomicStructure(session, name=Path(words[1]).name)
+        model.filename = words[1]
+        session.models.add([model])
+        return [model]
+    if words[0] == "marker":
+        # "marker #1.43 position ..." adds to (or creates) the marker set
+        parent_id = words[1].lstrip("#")
+        marker_sets = [m for m in session.models.list() if m.id_string == parent_id]
+        if marker_sets:
+            marker_set = marker_sets[0]
+        else:
+            marker_set = Structure(session, name="markers")
+            marker_set.id = tuple(int(i) for i in parent_id.split("."))
+            parents = [m for m in session.models.list() if m.id == marker_set.id[:-1]]
+            if parents:
+                parents[0].submodels.append(marker_set)
+            session.models._models.append(marker_set)
+            session.record_model_op("add")
+        marker_set.num_atoms += 1
+        return StubMarker(marker_set, marker_set.num_atoms)
+    return None
+
+class CmdDesc:
+
+    def __init__(self, required=(), optional=(), keyword=(), synopsis=None, **kw):
+        self.required = required
+        self.optional = optional
+        self.keyword = keyword
+        self.synopsis = synopsis
+
+class _Arg:
+    pass
+
+class BundleAPI:
+    pass
+
+class OpenerInfo:
+    pass
+
+def get_triggers(session=None):
+    global _atomic_triggers
+    if _atomic_triggers is None:
+        _atomic_triggers = StubTriggerSet()
+    return _atomic_triggers
+
+_atomic_triggers = None
+
+# ==========================================================================
+# Installation
+# ==========================================================================
+
+def _module(name, **attrs):
+    module = types.ModuleType(name)
+    module.__dict__.update(attrs)
+    sys.modules[name] = module
+    return module
+
+def install(src_dir=None):
+    """Register the stub chimerax modules and import the bundle from src/.
+
+    Returns:
+        module: The bundle package, importable as chimerax.proteincraft
+    """
+    if src_dir is None:
+        src_dir = Path(__file__).resolve().parent.parent / "src"
+    arg_names = ["AtomsArg", "BoolArg", "ColorArg", "IntArg", "EmptyArg", "StringArg"]
+    args = {name: type(name, (_Arg,), {}) for name in arg_names}
+
+    chimerax = _module("chimerax")
+    chimerax.__path__ = []
+    core = _module("chimerax.core")
+    core.__path__ = []
+    commands = _module("chimerax.core.commands", run=run, CmdDesc=CmdDesc,
+                       Or=lambda *a: _Arg, Bounded=lambda *a, **kw: _Arg,
+                       register=lambda *a, **kw: None, **args)
+    models = _module("chimerax.core.models", ADD_MODELS=ADD_MODELS,
+                     REMOVE_MODELS=REMOVE_MODELS,
+                     MODEL_POSITION_CHANGED=MODEL_POSITION_CHANGED)
+    selection = _module("chimerax.core.selection", SELECTION_CHANGED=SELECTION_CHANGED)
+    _module("chimerax.core.triggerset", DEREGISTER=DEREGISTER)
+    _module("chimerax.core.toolshed", BundleAPI=BundleAPI)
+    core.commands, core.models, core.selection = commands, models, selection
+    atomic = _module("chimerax.atomic", Structure=Structure,
+                     AtomicStructure=AtomicStructure, get_triggers=get_triggers,
+                     Residues=Residues, selected_residues=selected_residues,
+                     AtomsArg=args["AtomsArg"])
+    atomic.__path__ = []
+    atomic.struct_edit = _module("chimerax.atomic.struct_edit", add_atom=add_atom)
+    _module("chimerax.open_command", OpenerInfo=OpenerInfo)
+    chimerax.core, chimerax.atomic = core, atomic
+
+    spec = importlib.util.spec_from_file_location(
+        "chimerax.proteincraft", Path(src_dir) / "__init__.py",
+        submodule_search_locations=[str(src_dir)])
+    bundle = importlib.util.module_from_spec(spec)
+    sys.modules["chimerax.proteincraft"] = bundle
+    spec.loader.exec_module(bundle)
+    chimerax.proteincraft = bundle
+    return bundle
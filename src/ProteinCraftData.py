@@ -12,9 +12,13 @@ class ProteinCraftData:
     _flankingNum = 2  # Default number of flanking residues
     _flanking_enabled = False  # Default to showing flanking residues
     _flanking_transparency = 85  # Default transparency value (0-100)
+    _selection_state = {}  # Last posted selection, keyed by file path
     # Default chain colors
     CHAIN_A_COLOR = "#816DF9"
     CHAIN_B_COLOR = "#FB8686"
+    # Default colors for pcraftin design specs
+    DESIGNABLE_COLOR = "#D9D9D9"
+    HOTSPOT_COLOR = "#FFB000"
 
     @classmethod
     def get_instance(cls):
@@ -62,4 +66,13 @@ class ProteinCraftData:
         if isinstance(transparency, (int, float)) and 0 <= transparency <= 100:
             self._flanking_transparency = int(transparency)
         else:
-            raise ValueError("transparency must be a number between 0 and 100") 
\ No newline at end of file
+            raise ValueError("transparency must be a number between 0 and 100") 
+
+    def get_selection_state(self):
+        return self._selection_state
+
+    def set_selection_state(self, selection_state):
+        if isinstance(selection_state, dict):
+            self._selection_state = selection_state
+        else:
+            raise ValueError("selection_state must be a dict")
@@ -6,6 +6,8 @@ import json
 from chimerax.core import models, selection
 import chimerax.atomic as atomic
 from chimerax.open_command import OpenerInfo
+from numpy import concatenate, diff, nonzero, setdiff1d, unique
+from .ProteinCraftData import ProteinCraftData
 
 
 def initialize(session):
@@ -21,7 +23,9 @@ def _register_handlers(session):
     """Register event handlers for the session."""
     ts = session.triggers
     # 1) Selection changes
-    ts.add_handler(selection.SELECTION_CHANGED, lambda t, d: _post_event(session, "selection_changed", {}))
+    ts.add_handler(selection.SELECTION_CHANGED, lambda t, d: _post_selection_changes(session))
+    # Residues of closed structures leave the selection
+    ts.add_handler(models.REMOVE_MODELS, lambda t, closed: _post_selection_changes(session))
     # 2) Model position changes (e.g. moving or rotating models)
     ts.add_handler(models.MODEL_POSITION_CHANGED, lambda t, model: _post_event(session, "model_moved", {"model": model.id}))
     # 3) Per-frame draw (use this to detect camera/view changes)
@@ -35,6 +39,75 @@ def _post_event(session, event_type, data):
     payload = json.dumps({"event": event_type, "data": data}).encode('utf-8')
     session.logger.info("ProteinCraft: _post_event: " + payload.decode('utf-8'))
 
+def _number_ranges(numbers):
+    """Encode sorted, unique residue numbers as merged [start, end] ranges."""
+    breaks = nonzero(diff(numbers) != 1)[0]
+    starts = numbers[concatenate(([0], breaks + 1))]
+    ends = numbers[concatenate((breaks, [len(numbers) - 1]))]
+    return [[int(s), int(e)] for s, e in zip(starts, ends)]
+
+def _selection_by_path(session):
+    """Collect the selected residues of each file-backed structure.
+
+    Structures opened from the same file are combined, so a residue counts
+    as selected for a path if it is selected in any of them.
+
+    Returns:
+        dict: File path -> {chain ID: sorted unique residue numbers array}
+    """
+    from chimerax.atomic import selected_residues
+    grouped = {}
+    for struct, residues in selected_residues(session).by_structure:
+        path = getattr(struct, 'filename', None)
+        if path:
+            grouped.setdefault(path, []).append((residues.chain_ids, residues.numbers))
+    selection = {}
+    for path, arrays in grouped.items():
+        chain_ids = concatenate([chain_ids for chain_ids, _ in arrays])
+        numbers = concatenate([numbers for _, numbers in arrays])
+        selection[path] = {str(chain): unique(numbers[chain_ids == chain])
+                           for chain in unique(chain_ids)}
+    return selection
+
+def _selection_difference(selection, other):
+    """Residues in selection but not in other, as ranges per path and chain."""
+    difference = {}
+    for path, chains in selection.items():
+        other_chains = other.get(path, {})
+        ranges = {}
+        for chain, numbers in chains.items():
+            if chain in other_chains:
+                numbers = setdiff1d(numbers, other_chains[chain], assume_unique=True)
+            if len(numbers):
+                ranges[chain] = _number_ranges(numbers)
+        if ranges:
+            difference[path] = ranges
+    return difference
+
+def _selection_delta(session):
+    """Diff the current residue selection against the last posted one.
+
+    Only structures opened from a file (those ProteinCraft knows by path)
+    are tracked. The selection of each path is the union over its
+    structures, compared per chain with array set operations, so a residue
+    is never both added and removed in one delta.
+
+    Returns:
+        tuple: (added, removed), each a dict mapping file path to
+        {chain ID: list of [start, end] residue ranges}
+    """
+    data = ProteinCraftData.get_instance()
+    previous = data.get_selection_state()
+    current = _selection_by_path(session)
+    data.set_selection_state(current)
+    return _selection_difference(current, previous), _selection_difference(previous, current)
+
+def _post_selection_changes(session):
+    """Post the residues added to and removed from the selection."""
+    added, removed = _selection_delta(session)
+    if added or removed:
+        _post_event(session, "selection_changed", {"added": added, "removed": removed})
+
 def _post_camera_state(session):
     """Post the current camera state."""
     view = session.main_view  # a chimerax.graphics.view.View instance
@@ -54,6 +127,9 @@ def _post_display_changes(session, changes):
     """Post display changes for atomic structures."""
     if changes is None:
         return
+    # Skip the per-structure walk unless some structure's display changed
+    if 'display changed' not in changes.atomic_structure_reasons():
+        return
     # look for "display" attr changes on structures
     for struct in changes.modified_atomic_structures():
         if 'display changed' in changes.reasons(struct):
@@ -69,9 +145,9 @@ class _ProteinCraftAPI(BundleAPI):
         """Run the provider for opening files."""
         if mgr.name == "open command":
             class PcraftinOpenerInfo(OpenerInfo):
-                def open(self, session, data, file_name, **kw):
+                def open(self, session, paths, file_name, **kw):
                     from .io import open_pcraftin
-                    return open_pcraftin(session, data, file_name, **kw)
+                    return open_pcraftin(session, paths, file_name, **kw)
             return PcraftinOpenerInfo()
         return None
 
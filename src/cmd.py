@@ -55,8 +55,76 @@ def _open_model(session, filepath):
         session.logger.error(f"Error opening file {filepath}: {str(e)}")
         return None
 
-def _process_bonds(session, model, chain_a_color, bonds):
+def _interaction_color(interaction):
+    """Return the pbond color for an interaction type string."""
+    interaction_upper = interaction.upper()
+    if "HBOND" in interaction_upper:
+        return "#1f77b4"         # H‑Bond (light blue)
+    elif "PIPISTACK" in interaction_upper:
+        return "#ff7f0e"         # π‑π Stack (orange)
+    elif "PICATION" in interaction_upper:
+        return "#2ca02c"         # π‑Cation (green)
+    elif "IONIC" in interaction_upper:
+        return "#d62728"         # Ionic (red)
+    elif "DISULPHIDE" in interaction_upper:
+        return "#9467bd"         # Disulphide (purple)
+    elif "METAL" in interaction_upper:
+        return "#e377c2"         # Metal Coordination (pink)
+    elif "PIH" in interaction_upper:  # covers π‑H Bond
+        return "#bcbd22"         # π‑H Bond (yellow‑green)
+    elif "HALOGEN" in interaction_upper:
+        return "#17becf"         # Halogen (cyan)
+    elif "VDW" in interaction_upper:
+        return "#7f7f7f"         # van der Waals (gray)
+    elif "IAC" in interaction_upper:
+        return "#8c564b"         # IAC (brown)
+    return "gold"                # fallback
+
+def _residue_ranges(residues):
+    """Merge (chain, number) residue keys into sorted ranges per chain.
+
+    Returns:
+        dict: Chain ID -> list of (start, end) ranges, e.g. {"A": [(20, 23), (40, 41)]}
+    """
+    ranges = {}
+    for chain, number in sorted(set(residues)):
+        chain_ranges = ranges.setdefault(chain, [])
+        if chain_ranges and chain_ranges[-1][1] == number - 1:
+            chain_ranges[-1] = (chain_ranges[-1][0], number)
+        else:
+            chain_ranges.append((number, number))
+    return ranges
+
+def _ranges_spec(model_spec, ranges):
+    """Build a single atom spec covering all residue ranges of a model.
+
+    Args:
+        model_spec: Model specification, e.g. "#1"
+        ranges: Dict mapping chain ID to a list of (start, end) ranges
+
+    Returns:
+        str: Spec such as "#1/A:20,23,40-41/B:1-116", or None if ranges is empty
+    """
+    parts = []
+    for chain, chain_ranges in sorted(ranges.items()):
+        residues = ",".join(str(start) if start == end else f"{start}-{end}"
+                            for start, end in chain_ranges)
+        parts.append(f"/{chain}:{residues}")
+    if not parts:
+        return None
+    return model_spec + "".join(parts)
+
+def _process_bonds(session, model, chain_a_color, bonds, recolor_chain_a=True):
     """Process and display bonds for a model.
+
+    Residues are collected first so each styling operation (coloring,
+    cartoon and atom display) is a single command over one combined spec;
+    only pbonds and coordinate markers are created per unique bond. The
+    commands are issued in at most two ``run`` calls.
+
+    Args:
+        recolor_chain_a: Whether flanking mode recolors all of chain A; if
+            False only its transparency is changed, keeping existing colors
     
     Returns:
         bool: True if all bonds were processed successfully, False otherwise
@@ -69,140 +137,129 @@ def _process_bonds(session, model, chain_a_color, bonds):
     flanking_num = ProteinCraftData.get_instance().get_flanking_num()
     flanking_enabled = ProteinCraftData.get_instance().get_flanking_enabled()
     flanking_transparency = ProteinCraftData.get_instance().get_flanking_transparency()
+    model_spec = f"#{model.id_string}"
 
-    if flanking_enabled:
-        run(session, f"hide #{model.id_string}/A target c;", log=False)
-        run(session, f"color #{model.id_string}/A {chain_a_color} target c transparency {flanking_transparency};", log=False)
-    else:
-        run(session, f"show #{model.id_string}/A target c;", log=False)
-    
     # For AUTO mode, determine if we should show CA or ATOM based on bond count
     if bond_detail == BondDetailType.AUTO:
         if len(bonds) > 3:
             bond_detail = BondDetailType.CA
         else:
             bond_detail = BondDetailType.ATOM
-    
-    # Local dictionary to track bond pairs
-    bond_pairs = {}
-    
+
     success = True
+
+    # First pass: parse bonds, collect the residues to style and the
+    # markers needed for coordinate-valued atom specifications
+    parsed = []
+    residues1 = []
+    residues2 = []
+    markers = {}
     for bond in bonds:
-        atom1 = bond.get('atom1')
-        atom2 = bond.get('atom2')
         res1 = bond.get('res1')
         res2 = bond.get('res2')
-        interaction = bond.get('interaction', '')
-        
-        if all([atom1, atom2, res1, res2]):
+        if not res1 or not res2:
+            success = False
+            continue
+        try:
             # Parse residue strings to get chain and index
             chain1, index1 = res1.split(':')[:2]
             chain2, index2 = res2.split(':')[:2]
-            
-            # Format atom specifications for ChimeraX
-            residue1 = f"#{model.id_string}/{chain1}:{index1}"  
-            residue2 = f"#{model.id_string}/{chain2}:{index2}"  
-
-            # Color the residues and their flanking regions
-            commands = [
-                f"color {residue2} red target c",
-                ]
-            
-            if flanking_enabled:
-                flanking_start = max(1, int(index1) - flanking_num)
-                flanking_end = int(index1) + flanking_num
-                commands.extend([
-                    f"show #{model.id_string}/{chain1}:{flanking_start}-{flanking_end} target c",
-                    f"color {residue1} {chain_a_color} target c transparency 0;",
-                ])
-            else:
-                commands.extend([
-                    f"color {residue1} red target c",
-                    ])
-            
-            run(session, "; ".join(commands), log=False)
-            
-            # Construct the pbond command with appropriate color based on interaction type
-            color = "gold"  # default color
-            interaction_upper = interaction.upper()
-            if "HBOND" in interaction_upper:
-                color = "#1f77b4"         # H‑Bond (light blue)
-            elif "PIPISTACK" in interaction_upper:
-                color = "#ff7f0e"         # π‑π Stack (orange)
-            elif "PICATION" in interaction_upper:
-                color = "#2ca02c"         # π‑Cation (green)
-            elif "IONIC" in interaction_upper:
-                color = "#d62728"         # Ionic (red)
-            elif "DISULPHIDE" in interaction_upper:
-                color = "#9467bd"         # Disulphide (purple)
-            elif "METAL" in interaction_upper:
-                color = "#e377c2"         # Metal Coordination (pink)
-            elif "PIH" in interaction_upper:  # covers π‑H Bond
-                color = "#bcbd22"         # π‑H Bond (yellow‑green)
-            elif "HALOGEN" in interaction_upper:
-                color = "#17becf"         # Halogen (cyan)
-            elif "VDW" in interaction_upper:
-                color = "#7f7f7f"         # van der Waals (gray)
-            elif "IAC" in interaction_upper:
-                color = "#8c564b"         # IAC (brown)
-            else:
-                color = "gold"            # fallback
-            
-            radius = 0.1
+            key1, key2 = (chain1, int(index1)), (chain2, int(index2))
+        except ValueError:
+            session.logger.error(f"Invalid bond residues: {res1}, {res2}")
+            success = False
+            continue
+        residues1.append(key1)
+        residues2.append(key2)
 
-            # Handle atom specifications based on bond detail type
-            if bond_detail == BondDetailType.CA:
-                # For CA mode, always use CA atoms
-                atom1_spec = f"{residue1}@CA"
-                atom2_spec = f"{residue2}@CA"
-                run(session, 
-                    f"cartoon {residue1} suppressBackboneDisplay true; "
-                    f"cartoon {residue2} suppressBackboneDisplay true",
-                    log=False)
+        # Atom names may be null; those bonds fall back to CA atoms
+        atoms = [bond.get('atom1') or 'CA', bond.get('atom2') or 'CA']
+        if bond_detail == BondDetailType.CA:
+            atoms = ['CA', 'CA']
+        for atom in atoms:
+            if ',' in atom and atom not in markers:
+                markers[atom] = len(markers)
+        parsed.append((key1, key2, atoms, bond.get('interaction', '')))
 
-                # Create a unique key for the bond pair
-                pair_key = f"{residue1}-{residue2}"
-                count = bond_pairs.get(pair_key, 0) + 1
-                bond_pairs[pair_key] = count
-                
-                # Calculate radius based on occurrence count
-                base_radius = 0.1
-                radius = base_radius * count
-                
-                # Use gold color if bond appears more than once
-                if count > 1:
-                    color = "gold" 
+    if not parsed:
+        return success
+
+    # Create all markers in a single call
+    marker_objs = []
+    if markers:
+        try:
+            marker_objs = run(session, "; ".join(
+                f"marker {model_spec}.43 position {position} color gray radius 0.12"
+                for position in markers), log=False, return_list=True)
+        except Exception as e:
+            session.logger.error(f"Error creating bond markers for {model_spec}: {str(e)}")
+            return False
+        marker_objs[0].structure.name = "ProteinCraftMarkers"
+
+    # Second pass: one pbond per unique atom pair. Repeated CA pairs are
+    # drawn once, thicker and gold.
+    pbonds = {}
+    for key1, key2, atoms, interaction in parsed:
+        specs = []
+        for (chain, index), atom in zip((key1, key2), atoms):
+            if atom in markers:
+                specs.append(f"{model_spec}.43:{marker_objs[markers[atom]].serial_number}")
             else:
-                # For ATOM mode, use the specified atoms
-                if ',' in str(atom1):
-                    marker1 = f"marker #{model.id_string}.43 position {atom1} color gray radius 0.12"
-                    marker1_obj = run(session, marker1, log=False)
-                    marker1_obj.structure.name = "ProteinCraftMarkers"
-                    atom1_spec = f"#{model.id_string}.43:{marker1_obj.serial_number}"
-                else:
-                    atom1_spec = f"{residue1}@{atom1}"
-                
-                if ',' in str(atom2):
-                    marker2 = f"marker #{model.id_string}.43 position {atom2} color gray radius 0.12"
-                    marker2_obj = run(session, marker2, log=False)
-                    marker2_obj.structure.name = "ProteinCraftMarkers"
-                    atom2_spec = f"#{model.id_string}.43:{marker2_obj.serial_number}"
-                else:
-                    atom2_spec = f"{residue2}@{atom2}"
-
-                # Show atoms
-                run(session, 
-                    f"show {residue1} atoms; "
-                    f"show {residue2} atoms; "
-                    f"style {residue1} ball; "
-                    f"style {residue2} ball; "
-                    f"cartoon {residue1} suppressBackboneDisplay false; "
-                    f"cartoon {residue2} suppressBackboneDisplay false",
-                    log=False)
+                specs.append(f"{model_spec}/{chain}:{index}@{atom}")
+        pair = tuple(specs)
+        count = pbonds[pair][2] + 1 if pair in pbonds else 1
+        color = _interaction_color(interaction)
+        radius = 0.1
+        if bond_detail == BondDetailType.CA:
+            radius = 0.1 * count
+            if count > 1:
+                color = "gold"
+        pbonds[pair] = (color, radius, count)
 
-            # Use the appropriate specifications in pbond command
-            pbond_command = f"pbond {atom1_spec} {atom2_spec} color {color} radius {radius} dashes 4 name ProteinCraftBonds"
-            run(session, pbond_command, log=False)
+    spec1 = _ranges_spec(model_spec, _residue_ranges(residues1))
+    spec2 = _ranges_spec(model_spec, _residue_ranges(residues2))
+    all_spec = _ranges_spec(model_spec, _residue_ranges(residues1 + residues2))
+
+    commands = []
+    if flanking_enabled:
+        commands.append(f"hide {model_spec}/A target c")
+        if recolor_chain_a:
+            commands.append(f"color {model_spec}/A {chain_a_color} target c transparency {flanking_transparency}")
+        else:
+            commands.append(f"transparency {model_spec}/A {flanking_transparency} target c")
+    else:
+        commands.append(f"show {model_spec}/A target c")
+
+    # Color the residues and their flanking regions
+    commands.append(f"color {spec2} red target c")
+    if flanking_enabled:
+        flanking = [(chain, number)
+                    for chain, index in residues1
+                    for number in range(max(1, index - flanking_num), index + flanking_num + 1)]
+        commands.extend([
+            f"show {_ranges_spec(model_spec, _residue_ranges(flanking))} target c",
+            f"color {spec1} {chain_a_color} target c transparency 0",
+        ])
+    else:
+        commands.append(f"color {spec1} red target c")
+
+    if bond_detail == BondDetailType.CA:
+        commands.append(f"cartoon {all_spec} suppressBackboneDisplay true")
+    else:
+        commands.extend([
+            f"show {all_spec} atoms",
+            f"style {all_spec} ball",
+            f"cartoon {all_spec} suppressBackboneDisplay false",
+        ])
+
+    for (atom1_spec, atom2_spec), (color, radius, _) in pbonds.items():
+        commands.append(f"pbond {atom1_spec} {atom2_spec} color {color} radius {radius:g} dashes 4 name ProteinCraftBonds")
+
+    try:
+        run(session, "; ".join(commands), log=False)
+    except Exception as e:
+        session.logger.error(f"Error drawing bonds for {model_spec}: {str(e)}")
+        success = False
             
     return success
 
@@ -1,8 +1,15 @@
 # vim: set expandtab shiftwidth=4 softtabstop=4:
 
 import json
+import os
+import re
+from functools import lru_cache
+from glob import glob
+from pathlib import Path
 from chimerax.core.commands import run
-from .cmd import _open_model, _process_bonds
+from chimerax.core.models import ADD_MODELS
+from chimerax.core.triggerset import DEREGISTER
+from .cmd import _open_model, _process_bonds, _ranges_spec
 from chimerax.atomic import Structure, AtomicStructure
 from .ProteinCraftData import ProteinCraftData
 from numpy import array, float64
@@ -70,36 +77,235 @@ def _read_pdb_block(session, stream, line_number=0):
     
     return s, line_number
 
-def open_pcraftin(session, data, file_name, **kw):
-    """Open a ProteinCraft input file.
+# Contig segments ("A20-23", "2-5") and hotspots ("B40"), as in the schema
+_CONTIG_SEGMENT = re.compile(r"^[A-Z]?\d+-\d+$")
+_HOTSPOT = re.compile(r"^[A-Z]\d+$")
+
+def _parse_contigs(contigs):
+    """Parse RFdiffusion contig strings into fixed and designable residue ranges.
+
+    Segments with a chain letter (e.g. ``A20-23``) are fixed residues taken
+    from the input structure; segments without one (e.g. ``2-5``) are
+    designable stretches that follow on from the previous segment in the
+    same chain. A ``0`` segment is a chain break.
+
+    Args:
+        contigs: List of contig strings, e.g. ["19-19/A20-20/2-2/0", "B1-116"]
+
+    Returns:
+        tuple: (fixed, designable), each a dict mapping chain ID to a list of
+        (start, end) residue number ranges
+
+    Raises:
+        ValueError: If a contig segment is malformed
+    """
+    fixed = {}
+    designable = {}
+    for contig in contigs:
+        if not isinstance(contig, str):
+            raise ValueError(f"contig {contig!r} is not a string")
+        segments = contig.split('/')
+        # Split on chain breaks so each group is a single chain
+        groups = [[]]
+        for seg in segments:
+            if seg == '0':
+                groups.append([])
+            elif _CONTIG_SEGMENT.match(seg):
+                groups[-1].append(seg)
+            else:
+                raise ValueError(f"malformed segment {seg!r} in contig {contig!r}")
+
+        for group in groups:
+            # Designable segments before the first fixed one belong to the
+            # chain of that fixed segment; default to the design chain A
+            chain = next((seg[0] for seg in group if seg[0].isalpha()), 'A')
+            position = 1
+            for seg in group:
+                if seg[0].isalpha():
+                    chain = seg[0]
+                    start, end = (int(v) for v in seg[1:].split('-'))
+                    fixed.setdefault(chain, []).append((start, end))
+                    position = end + 1
+                else:
+                    # Variable-length segments ("2-5") use their minimum length
+                    length = int(seg.split('-')[0])
+                    if length > 0:
+                        designable.setdefault(chain, []).append((position, position + length - 1))
+                    position += length
+    return fixed, designable
+
+def _parse_hotspots(hotspot_res):
+    """Parse hotspot residues (e.g. ["B40", "B99"]) into chain residue ranges.
+
+    Raises:
+        ValueError: If a hotspot is not a chain letter followed by a residue number
+    """
+    hotspots = {}
+    for res in hotspot_res:
+        if not isinstance(res, str) or not _HOTSPOT.match(res):
+            raise ValueError(f"malformed hotspot residue {res!r}")
+        number = int(res[1:])
+        hotspots.setdefault(res[0], []).append((number, number))
+    return hotspots
+
+@lru_cache(maxsize=None)
+def _pcraftin_validator():
+    """Load the pcraftin schema and compile its validator once per session."""
+    with open(Path(__file__).parent / "pcraftin_schema.json", 'r') as schema_file:
+        schema = json.load(schema_file)
+    try:
+        import jsonschema
+    except ImportError:
+        # Without jsonschema only the required top-level keys can be checked
+        required = schema.get('required', [])
+        return lambda instance: [f"'{key}' is a required property"
+                                 for key in required if key not in instance]
+    validator_cls = jsonschema.validators.validator_for(schema)
+    validator_cls.check_schema(schema)
+    validator = validator_cls(schema)
+    return lambda instance: [error.message for error in validator.iter_errors(instance)]
+
+def _expand_pcraftin_paths(paths):
+    """Expand directories into the pcraftin files they contain."""
+    if isinstance(paths, str):
+        paths = [paths]
+    expanded = []
+    for path in paths:
+        if os.path.isdir(path):
+            expanded.extend(sorted(glob(os.path.join(path, "*.pcraftin.json"))))
+        else:
+            expanded.append(path)
+    return expanded
+
+def _render_pcraftin(session, models):
+    """Apply pcraftin design specs to models that have been added to the session.
+
+    Each model is styled with its chain colors and contig and hotspot
+    highlights in one command, then its pbonds are drawn by _process_bonds
+    so the bond residue highlights stay on top. Errors are logged per file
+    so one bad entry does not stop the rest of the batch.
+    """
+    for model in models:
+        model_spec = f"#{model.id_string}"
+        try:
+            commands = [
+                f"color {model_spec}/A {ProteinCraftData.CHAIN_A_COLOR}",
+                f"color {model_spec}/B {ProteinCraftData.CHAIN_B_COLOR}",
+                f"hide {model_spec} atoms",
+            ]
+            # Fixed residues stay opaque when flanking makes chain A transparent
+            fixed_spec = _ranges_spec(model_spec, model.pcraftin_fixed)
+            if fixed_spec:
+                commands.append(f"transparency {fixed_spec} 0 target c")
+            designable_spec = _ranges_spec(model_spec, model.pcraftin_designable)
+            if designable_spec:
+                commands.append(f"color {designable_spec} {ProteinCraftData.DESIGNABLE_COLOR} target c")
+            hotspot_spec = _ranges_spec(model_spec, model.pcraftin_hotspots)
+            if hotspot_spec:
+                commands.extend([
+                    f"show {hotspot_spec} atoms",
+                    f"style {hotspot_spec} stick",
+                    f"color {hotspot_spec} {ProteinCraftData.HOTSPOT_COLOR}",
+                ])
+            commands.append(f"color {model_spec} byhetero")
+            run(session, "; ".join(commands), log=False)
+
+            # Keep the design colors of chain A; flanking only fades it
+            if not _process_bonds(session, model, ProteinCraftData.CHAIN_A_COLOR,
+                                  model.pcraftin_pbonds, recolor_chain_a=False):
+                session.logger.warning(
+                    f"Failed to process some bonds of ProteinCraft input file {model.pcraftin_path}")
+        except Exception as e:
+            session.logger.error(
+                f"Error rendering ProteinCraft input file {model.pcraftin_path}: {str(e)}")
+
+def _load_pcraftin(session, path):
+    """Read one pcraftin file and its input PDB into an unrendered model.
+
+    Returns:
+        AtomicStructure: The model, or None if the file could not be loaded
+    """
+    with open(path, 'r') as pcraftin_file:
+        pcraftin_data = json.load(pcraftin_file)
+
+    errors = _pcraftin_validator()(pcraftin_data)
+    if errors:
+        session.logger.error(f"Invalid ProteinCraft input file {path}: {'; '.join(errors)}")
+        return None
+
+    # Parse the design specs before building a structure that would leak on error
+    try:
+        fixed, designable = _parse_contigs(pcraftin_data['contigs'])
+        hotspots = _parse_hotspots(pcraftin_data['hotspot_res'])
+    except (ValueError, TypeError) as e:
+        session.logger.error(f"Invalid ProteinCraft input file {path}: {str(e)}")
+        return None
+
+    # Relative PDB paths are resolved against the pcraftin file
+    pdb_path = os.path.join(os.path.dirname(os.path.abspath(path)), pcraftin_data['input_pdb'])
+    with open(pdb_path, 'r') as pdb_file:
+        model, _ = _read_pdb_block(session, pdb_file)
+    if model is None:
+        session.logger.error(f"Failed to open PDB file: {pdb_path}")
+        return None
+
+    name = os.path.basename(path)
+    if name.endswith(".pcraftin.json"):
+        name = name[:-len(".pcraftin.json")]
+    model.name = name
+    model.filename = pdb_path
+    model.pcraftin_path = path
+    model.pcraftin_fixed = fixed
+    model.pcraftin_designable = designable
+    model.pcraftin_hotspots = hotspots
+    model.pcraftin_pbonds = pcraftin_data.get('pbonds', [])
+    return model
+
+def open_pcraftin(session, paths, file_name, **kw):
+    """Open one or more ProteinCraft input files.
+
+    The opener is registered as a batch opener, so a directory or glob of
+    pcraftin files is opened in a single call. Design specs are rendered
+    once all models have been added to the session.
     
     Args:
         session: The ChimeraX session
-        data: File data stream
+        paths: Path or list of paths to pcraftin files or directories
         file_name: Name of the file being opened
         **kw: Additional keyword arguments
         
     Returns:
         tuple: (list of models created, status message)
     """
-    try:
-        # Parse the JSON data
-        pcraftin_data = json.load(data)
-        pdb_path = pcraftin_data['input_pdb']
-                
-        with open(pdb_path, 'r') as pdb_file:
-            model, _ = _read_pdb_block(session, pdb_file)
-        if model is None:
-            session.logger.error(f"Failed to open PDB file: {pdb_path}")
-            return [], f"Failed to open PDB file: {pdb_path}"
-            
-        # Apply default colors from ProteinCraftData
-        chain_a_color = ProteinCraftData.CHAIN_A_COLOR
-        chain_b_color = ProteinCraftData.CHAIN_B_COLOR
-        
+    models = []
+    for path in _expand_pcraftin_paths(paths):
+        try:
+            model = _load_pcraftin(session, path)
+        except Exception as e:
+            session.logger.error(f"Error opening ProteinCraft input file {path}: {str(e)}")
+            continue
+        if model is not None:
+            models.append(model)
+
+    if not models:
+        return [], f"No ProteinCraft input files opened from {file_name}"
+
+    # Render models as they are added; models deleted without ever being
+    # added (e.g. a failed open) are dropped so the handler can go away
+    pending = list(models)
+    def _render_added(trigger_name, added_models):
+        added = [model for model in pending if model in added_models]
+        pending[:] = [model for model in pending
+                      if model not in added and not getattr(model, 'deleted', False)]
+        if added:
+            _render_pcraftin(session, added)
+        if not pending:
+            return DEREGISTER
+        return None
+    session.triggers.add_handler(ADD_MODELS, _render_added)
+
+    if len(models) == 1:
         status = f"Opened ProteinCraft input file {file_name}"
-        return [model], status
-        
-    except Exception as e:
-        session.logger.error(f"Error opening ProteinCraft input file: {str(e)}")
-        return [], f"Error opening ProteinCraft input file: {str(e)}"
\ No newline at end of file
+    else:
+        status = f"Opened {len(models)} ProteinCraft input files"
+    return models, status